@@ -2,13 +2,34 @@
 Tic Tac Toe Player
 """
 
-import copy
+from functools import lru_cache
 
 X = "X"
 O = "O"
 EMPTY = None
 cur_player = X
 
+# The 8 symmetries of the board (rotations and reflections), each given as
+# the flat index (3 * i + j) that every position of the new board is read from
+SYMMETRIES = [
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),
+    (8, 5, 2, 7, 4, 1, 6, 3, 0),
+]
+
+# Bit 8 - (3 * i + j) is set for cell (i, j)
+FULL_MASK = 0b111111111
+WIN_MASKS = [
+    0b111000000, 0b000111000, 0b000000111,  # Horizontally
+    0b100100100, 0b010010010, 0b001001001,  # Vertically
+    0b100010001, 0b001010100,               # Diagonally
+]
+
 
 def initial_state():
     """
@@ -51,7 +72,7 @@ def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    new_board = copy.deepcopy(board)
+    new_board = [row[:] for row in board]
     row, col = action
     player_now = player(board)
     new_board[row][col] = player_now
@@ -107,6 +128,136 @@ def utility(board):
     return 0
 
 
+def _bits(board):
+    """
+    Returns (xbits, obits), the cells held by each player packed as bitmasks.
+    """
+    xbits = obits = 0
+    for row in board:
+        for box in row:
+            xbits <<= 1
+            obits <<= 1
+            if box == X:
+                xbits |= 1
+            elif box == O:
+                obits |= 1
+    return xbits, obits
+
+
+def _line_winner(xbits, obits):
+    """
+    Returns the player holding a full winning line, if there is one.
+    """
+    for mask in WIN_MASKS:
+        if xbits & mask == mask:
+            return X
+        if obits & mask == mask:
+            return O
+    return None
+
+
+def _permute(mask, symmetry):
+    """
+    Returns mask with its cells rearranged by an index permutation from
+    SYMMETRIES.
+    """
+    permuted = 0
+    for k, source in enumerate(symmetry):
+        if mask >> (8 - source) & 1:
+            permuted |= 1 << (8 - k)
+    return permuted
+
+
+# SYMMETRY_TABLES[s][mask] is mask permuted by SYMMETRIES[s]
+SYMMETRY_TABLES = [
+    [_permute(mask, symmetry) for mask in range(FULL_MASK + 1)]
+    for symmetry in SYMMETRIES
+]
+
+
+def canonical(xbits, obits):
+    """
+    Returns (xbits, obits, symmetry) for the smallest of the 8 symmetric
+    forms of the position, where symmetry is the index permutation from
+    SYMMETRIES that produces it.
+    """
+    best = None
+    best_symmetry = None
+    for table, symmetry in zip(SYMMETRY_TABLES, SYMMETRIES):
+        candidate = (table[xbits], table[obits])
+        if best is None or candidate < best:
+            best = candidate
+            best_symmetry = symmetry
+    return best[0], best[1], best_symmetry
+
+
+def _successors(xbits, obits, mark):
+    """
+    Yields (index, canonical_xbits, canonical_obits) for every move, given as
+    the flat index 3 * i + j, skipping moves that lead to a position
+    symmetric to one already yielded.
+    """
+    seen = set()
+    taken = xbits | obits
+    for index in range(9):
+        bit = 1 << (8 - index)
+        if taken & bit:
+            continue
+        if mark == X:
+            child = canonical(xbits | bit, obits)[:2]
+        else:
+            child = canonical(xbits, obits | bit)[:2]
+        if child not in seen:
+            seen.add(child)
+            yield index, child[0], child[1]
+
+
+@lru_cache(maxsize=None)
+def _optimal(xbits, obits, current_player, alpha, beta):
+    """
+    Returns (score, index) for a canonical position, memoized so positions
+    reached by different move orders or symmetric to each other are only
+    searched once.
+    """
+    win = _line_winner(xbits, obits)
+    if win == X:
+        return 1, None
+    if win == O:
+        return -1, None
+    if xbits | obits == FULL_MASK:
+        return 0, None
+
+    if current_player == X:
+        best_score = -float('inf')
+        best_action = None
+        for move, new_xbits, new_obits in _successors(xbits, obits, X):
+            score, _ = _optimal(new_xbits, new_obits, O, alpha, beta)
+            if score == 1:
+                return 1, move
+            if score > best_score:
+                best_score = score
+                best_action = move
+            alpha = max(alpha, best_score)
+            if alpha >= beta:
+                break
+        return best_score, best_action
+
+    else:  # O is minimizing
+        best_score = float('inf')
+        best_action = None
+        for move, new_xbits, new_obits in _successors(xbits, obits, O):
+            score, _ = _optimal(new_xbits, new_obits, X, alpha, beta)
+            if score == -1:
+                return -1, move
+            if score < best_score:
+                best_score = score
+                best_action = move
+            beta = min(beta, best_score)
+            if beta <= alpha:
+                break
+        return best_score, best_action
+
+
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
@@ -115,35 +266,9 @@ def minimax(board):
     if terminal(board):
         return None
 
-    def optimal(board, current_player):
-        if terminal(board):
-            return utility(board), None
-
-        if current_player == X:
-            best_score = -float('inf')
-            best_action = None
-            for move in actions(board):
-                new_board = result(board, move)
-                score, _ = optimal(new_board, O)
-                if score == 1:
-                    return 1, move
-                if score > best_score:
-                    best_score = score
-                    best_action = move
-            return best_score, best_action
-
-        else:  # O is minimizing
-            best_score = float('inf')
-            best_action = None
-            for move in actions(board):
-                new_board = result(board, move)
-                score, _ = optimal(new_board, X)
-                if score == -1:
-                    return -1, move
-                if score < best_score:
-                    best_score = score
-                    best_action = move
-            return best_score, best_action
-
-    _, optimal_move = optimal(board, player(board))
-    return optimal_move
+    xbits, obits, symmetry = canonical(*_bits(board))
+    _, move = _optimal(xbits, obits, player(board), -float('inf'), float('inf'))
+
+    # Map the move on the canonical board back onto the original board
+    index = symmetry[move]
+    return index // 3, index % 3
@@ -1,9 +1,11 @@
-import itertools
 import random
-import copy
+from collections import deque
 
 N = 8
 
+# Largest group of linked frontier cells to enumerate exactly
+MAX_FRONTIER = 25
+
 
 class Minesweeper():
     """
@@ -26,12 +28,18 @@ class Minesweeper():
             self.board.append(row)
 
         # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        for index in random.sample(range(height * width), mines):
+            i, j = divmod(index, width)
+            self.mines.add((i, j))
+            self.board[i][j] = True
+
+        # Count nearby mines for every cell once, so lookups are O(1)
+        self.nearby = [[0] * width for _ in range(height)]
+        for mine_i, mine_j in self.mines:
+            for i in range(mine_i - 1, mine_i + 2):
+                for j in range(mine_j - 1, mine_j + 2):
+                    if (i, j) != (mine_i, mine_j) and 0 <= i < height and 0 <= j < width:
+                        self.nearby[i][j] += 1
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -62,23 +70,8 @@ class Minesweeper():
         not including the cell itself.
         """
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        i, j = cell
+        return self.nearby[i][j]
 
     def won(self):
         """
@@ -92,24 +85,66 @@ class Sentence():
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    The cells are stored as a bitmask, with cell (i, j) at bit i * width + j,
+    so `width` must be the width of the board the cells come from.
     """
 
-    def __init__(self, cells, count):
-        self.cells = set(cells)
+    def __init__(self, cells, count, width=N):
+        self.width = width
+        self.mask = 0
+        for cell in cells:
+            self.mask |= self.bit(cell)
         self.count = count
 
+    @classmethod
+    def from_mask(cls, mask, count, width=N):
+        """
+        Returns a sentence over the cells already packed into mask.
+        """
+        sentence = cls((), count, width)
+        sentence.mask = mask
+        return sentence
+
+    @property
+    def cells(self):
+        """
+        Returns a read-only frozenset of the cells in the sentence, decoded
+        from self.mask, which is the only storage.
+        """
+        cells = []
+        mask = self.mask
+        while mask:
+            bit = mask & -mask
+            cells.append(divmod(bit.bit_length() - 1, self.width))
+            mask ^= bit
+        return frozenset(cells)
+
     def __eq__(self, other):
-        return self.cells == other.cells and self.count == other.count
+        return (self.width == other.width and self.mask == other.mask
+                and self.count == other.count)
 
     def __str__(self):
-        return f"{self.cells} = {self.count}"
+        return f"{set(self.cells)} = {self.count}"
+
+    def __len__(self):
+        return bin(self.mask).count("1")
+
+    def bit(self, cell):
+        """
+        Returns the bitmask of a single cell.
+        """
+        i, j = cell
+        if i < 0 or not 0 <= j < self.width:
+            raise ValueError(f"cell {cell} is outside a board of width {self.width}")
+        return 1 << (i * self.width + j)
 
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
         """
-        if len(self.cells) == self.count:
-            return copy.deepcopy(self.cells)
+        if len(self) == self.count:
+            return self.cells
         return None
 
     def known_safes(self):
@@ -117,7 +152,7 @@ class Sentence():
         Returns the set of all cells in self.cells known to be safe.
         """
         if self.count == 0:
-            return copy.deepcopy(self.cells)
+            return self.cells
         return None
 
     def mark_mine(self, cell):
@@ -125,19 +160,17 @@ class Sentence():
         Updates internal knowledge representation given the fact that
         a cell is known to be a mine.
         """
-        if len(self.cells) == 0 or cell not in self.cells:
-            return
-        self.cells.remove(cell)
-        self.count -= 1
+        bit = self.bit(cell)
+        if self.mask & bit:
+            self.mask &= ~bit
+            self.count -= 1
 
     def mark_safe(self, cell):
         """
         Updates internal knowledge representation given the fact that
         a cell is known to be safe.
         """
-        if len(self.cells) == 0 or cell not in self.cells:
-            return
-        self.cells.remove(cell)
+        self.mask &= ~self.bit(cell)
 
 
 class MinesweeperAI():
@@ -145,11 +178,12 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=N, width=N):
+    def __init__(self, height=N, width=N, mines=N):
 
-        # Set initial height and width
+        # Set initial height, width, and number of mines
         self.height = height
         self.width = width
+        self.total_mines = mines
 
         # Keep track of which cells have been clicked on
         self.moves_made = set()
@@ -161,6 +195,9 @@ class MinesweeperAI():
         # List of sentences about the game known to be true
         self.knowledge = []
 
+        # Chance of each frontier cell being a mine
+        self.probabilities = {}
+
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
@@ -179,6 +216,98 @@ class MinesweeperAI():
         for sentence in self.knowledge:
             sentence.mark_safe(cell)
 
+    def mark_known(self, cell, mine, pending):
+        """
+        Marks a cell as a mine or as safe, queueing every sentence
+        that mentions it for another round of inference.
+        """
+        for sentence in self.knowledge:
+            if sentence.mask & sentence.bit(cell):
+                pending.append(sentence)
+        if mine:
+            self.mark_mine(cell)
+        else:
+            self.mark_safe(cell)
+
+    def mine_probabilities(self):
+        """
+        Returns a dict mapping each cell in the knowledge base to the
+        fraction of consistent mine assignments in which it is a mine.
+
+        Cells linked through shared sentences are enumerated together,
+        groups larger than MAX_FRONTIER are too costly to enumerate, so
+        their cells get the highest count / size of the sentences they
+        appear in instead.
+        """
+        groups = []
+        for sentence in self.knowledge:
+            if not sentence.mask:
+                continue
+            mask = sentence.mask
+            members = [sentence]
+            for group in groups[:]:
+                if group[0] & mask:
+                    mask |= group[0]
+                    members += group[1]
+                    groups.remove(group)
+            groups.append((mask, members))
+
+        probabilities = {}
+        for mask, members in groups:
+            if bin(mask).count("1") > MAX_FRONTIER:
+                for sentence in members:
+                    estimate = sentence.count / len(sentence)
+                    for cell in sentence.cells:
+                        probabilities[cell] = max(probabilities.get(cell, 0), estimate)
+                continue
+
+            # Order cells sentence by sentence so constraints close early
+            cells = []
+            for sentence in members:
+                for cell in sorted(sentence.cells):
+                    if cell not in cells:
+                        cells.append(cell)
+
+            # Re-encode each sentence over the group's own cell indices
+            index = {cell: k for k, cell in enumerate(cells)}
+            constraints = [[] for _ in cells]
+            for sentence in members:
+                local = 0
+                for cell in sentence.cells:
+                    local |= 1 << index[cell]
+                for cell in sentence.cells:
+                    constraints[index[cell]].append((local, sentence.count))
+
+            solutions = 0
+            mine_counts = [0] * len(cells)
+
+            def search(k, mines):
+                nonlocal solutions
+
+                # Only sentences touching the last assigned cell can break
+                if k > 0:
+                    assigned = (1 << k) - 1
+                    for local, count in constraints[k - 1]:
+                        found = bin(mines & local).count("1")
+                        unknown = bin(local & ~assigned).count("1")
+                        if found > count or found + unknown < count:
+                            return
+                if k == len(cells):
+                    solutions += 1
+                    for i in range(len(cells)):
+                        if mines >> i & 1:
+                            mine_counts[i] += 1
+                    return
+                search(k + 1, mines)
+                search(k + 1, mines | 1 << k)
+
+            search(0, 0)
+            if solutions:
+                for cell, mine_count in zip(cells, mine_counts):
+                    probabilities[cell] = mine_count / solutions
+
+        return probabilities
+
     def add_knowledge(self, cell, count):
         """
         Called when the Minesweeper board tells us, for a given
@@ -195,7 +324,10 @@ class MinesweeperAI():
                if they can be inferred from existing knowledge
         """
         self.moves_made.add(cell)
-        self.mark_safe(cell)
+
+        # Sentences containing the cell shrink, so they need another look too
+        pending = deque()
+        self.mark_known(cell, False, pending)
 
         # Find Neighbours
         neighbors = set()
@@ -204,42 +336,68 @@ class MinesweeperAI():
                 if 0 <= i < self.height and 0 <= j < self.width and (i, j) != cell and (i, j) not in self.moves_made:
                     neighbors.add((i, j))
 
-        new_sentance = Sentence(neighbors, count)
+        # Leave out cells whose state is already known
+        count -= len(neighbors & self.mines)
+        neighbors -= self.mines | self.safes
+
+        new_sentance = Sentence(neighbors, count, self.width)
         self.knowledge.append(new_sentance)
 
-        # Empty the known_safe and known_mines sentences
-        for sentence in self.knowledge:
-            known_safe_set = sentence.known_safes()
-            known_mine_set = sentence.known_mines()
-            if known_safe_set is not None:
-                for cell in known_safe_set:
-                    self.mark_safe(cell)
-            elif known_mine_set is not None:
-                for cell in known_mine_set:
-                    self.mark_mine(cell)
-
-         # Filter out empty sentences
-        self.knowledge[:] = [
-            sentence for sentence in self.knowledge if len(sentence.cells) > 0]
-
-        # Inference based on subsets
-        for sentence1, sentence2 in itertools.combinations(self.knowledge, 2):
-            if sentence1.cells in sentence2.cells:
-                difference_cells = sentence2.cells - sentence1.cells
-                difference_count = sentence2.count - sentence1.count
-                diff_sentance = Sentence(difference_cells, difference_count)
-                # print('subs1', str(sentence2), "Sen", str(
-                #     sentence1), "Diff", str(diff_sentance))
-                self.handle_inference(diff_sentance)
-
-            elif sentence2.cells in sentence1.cells:
-                difference_cells = sentence1.cells - sentence2.cells
-                difference_count = sentence1.count - sentence2.count
-                diff_sentance = Sentence(difference_cells, difference_count)
-                # print('subs2', str(sentence1), "Sen", str(
-                #     sentence2), "Diff", str(diff_sentance))
-                self.handle_inference(diff_sentance)
+        # Worklist of sentences that are new or changed since they were last
+        # compared against the rest of the knowledge base
+        pending.append(new_sentance)
+        while pending:
+            while pending:
+                sentence = pending.popleft()
+                if not sentence.mask:
+                    continue
 
+                # Empty the known_safe and known_mines sentences
+                known_safe_set = sentence.known_safes()
+                known_mine_set = sentence.known_mines()
+                if known_safe_set:
+                    for cell in known_safe_set:
+                        self.mark_known(cell, False, pending)
+                    continue
+                if known_mine_set:
+                    for cell in known_mine_set:
+                        self.mark_known(cell, True, pending)
+                    continue
+
+                # Inference based on subsets, against every other sentence once
+                for other in list(self.knowledge):
+                    if sentence.mask == other.mask:
+                        continue
+                    if sentence.mask & other.mask == sentence.mask:
+                        subset, superset = sentence, other
+                    elif sentence.mask & other.mask == other.mask:
+                        subset, superset = other, sentence
+                    else:
+                        continue
+
+                    difference_mask = superset.mask & ~subset.mask
+                    difference_count = superset.count - subset.count
+                    diff_sentance = Sentence.from_mask(
+                        difference_mask, difference_count, self.width)
+                    if diff_sentance not in self.knowledge:
+                        self.knowledge.append(diff_sentance)
+                        pending.append(diff_sentance)
+
+            # Once subset inference is exhausted, fall back to enumerating
+            # every mine assignment consistent with the knowledge base
+            self.probabilities = self.mine_probabilities()
+            for cell, probability in self.probabilities.items():
+                if probability == 0:
+                    self.mark_known(cell, False, pending)
+                elif probability == 1:
+                    self.mark_known(cell, True, pending)
+
+        # Filter out empty sentences and duplicates of the same cells
+        unique = {}
+        for sentence in self.knowledge:
+            if sentence.mask:
+                unique.setdefault(sentence.mask, sentence)
+        self.knowledge[:] = unique.values()
 
         # print([str(sentence) for sentence in self.knowledge])
 
@@ -254,7 +412,7 @@ class MinesweeperAI():
         """
         for cell in self.safes:
             if cell not in self.moves_made:
-                return copy.deepcopy(cell)
+                return cell
         return None
 
     def make_random_move(self):
@@ -266,19 +424,20 @@ class MinesweeperAI():
         """
         available_moves = [(i, j) for i in range(self.height) for j in range(self.width)
                            if (i, j) not in self.moves_made and (i, j) not in self.mines]
-        if available_moves:
-            res = random.choice(available_moves)
-            return res
-        return None
-
-    def handle_inference(self, inference):
-        known_safe_set = inference.known_safes()
-        known_mine_set = inference.known_mines()
-        if known_safe_set is not None:
-            for cell in known_safe_set:
-                self.mark_safe(cell)
-        elif known_mine_set is not None:
-            for cell in known_mine_set:
-                self.mark_mine(cell)
-        else:
-            self.knowledge.append(inference)
\ No newline at end of file
+        if not available_moves:
+            return None
+
+        # Cells outside the frontier share the mines not expected on it.
+        # Groups are enumerated without the global mine count, so their
+        # expected mines can exceed what is left
+        frontier = [cell for cell in available_moves if cell in self.probabilities]
+        unconstrained = len(available_moves) - len(frontier)
+        remaining = max(self.total_mines - len(self.mines) -
+                        sum(self.probabilities[cell] for cell in frontier), 0)
+        default = remaining / unconstrained if unconstrained else 1
+
+        # Choose randomly among the cells least likely to be mines
+        lowest = min(self.probabilities.get(cell, default) for cell in available_moves)
+        res = random.choice([cell for cell in available_moves
+                             if self.probabilities.get(cell, default) == lowest])
+        return res
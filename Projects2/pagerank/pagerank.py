@@ -2,17 +2,21 @@ import os
 import random
 import re
 import sys
-from collections import defaultdict
+from collections import Counter, defaultdict
 
 DAMPING = 0.85
 SAMPLES = 10000
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
+    args = sys.argv[1:]
+    walk = "--walk" in args
+    if walk:
+        args.remove("--walk")
+    if len(args) != 1:
+        sys.exit("Usage: python pagerank.py [--walk] corpus")
+    corpus = crawl(args[0])
+    ranks = sample_pagerank(corpus, DAMPING, SAMPLES, walk)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
@@ -75,25 +79,62 @@ def transition_model(corpus, page, damping_factor):
     return model
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, walk=False):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
 
+    The random walk only matters through how often it visits each page,
+    so by default the `n` samples are drawn directly from the stationary
+    distribution found by `iterate_pagerank`. Pass `walk=True` to
+    simulate the random walk step by step instead.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    # First sample
-    page_rank = {page: 0 for page in corpus}
-    current_page = random.choice(list(corpus.keys()))
+    pages = list(corpus)
+
+    if not walk:
+        ranks = iterate_pagerank(corpus, damping_factor)
+        counts = Counter(random.choices(pages, weights=[ranks[page] for page in pages], k=n))
+        return {page: counts[page] / n for page in pages}
+
+    # Flatten the links into integer page ids, with the links of page i
+    # stored in indices[indptr[i]:indptr[i + 1]]
+    ids = {page: i for i, page in enumerate(pages)}
+    indptr = [0]
+    indices = []
+    for page in pages:
+        indices.extend(ids[link] for link in corpus[page])
+        indptr.append(len(indices))
+
+    counts = walk_pagerank(indptr, indices, random.randrange(len(pages)), n, damping_factor)
+    return {page: counts[i] / n for i, page in enumerate(pages)}
+
+
+def walk_pagerank(indptr, indices, start, n, damping_factor):
+    """
+    Return how many of `n` steps of the random surfer, starting at page id
+    `start`, land on each page id.
+
+    Equivalent to sampling from `transition_model` at every step: with
+    probability `damping_factor` follow one of the page's links, otherwise
+    (or if the page has no links) jump to any page uniformly.
+    """
+    N = len(indptr) - 1
+    counts = [0] * N
+    current = start
     for _ in range(n):
-        page_rank[current_page] += 1
-        transition = transition_model(corpus, current_page, damping_factor)
-        next_page = random.choices(list(transition.keys()), weights=list(transition.values()), k=1)[0]
-        current_page = next_page
-    page_rank = {page: rank/n for page, rank in page_rank.items()}
-    return page_rank
+        counts[current] += 1
+        first = indptr[current]
+        links = indptr[current + 1] - first
+        if links and random.random() < damping_factor:
+            current = indices[first + int(random.random() * links)]
+        else:
+            current = int(random.random() * N)
+    return counts
+
 
 def iterate_pagerank(corpus, damping_factor):
     """
@@ -104,29 +145,37 @@ def iterate_pagerank(corpus, damping_factor):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    page_rank = {page:1/len(corpus) for page in corpus}
     N = len(corpus)
     convergence_threshold = 0.001
 
+    # Invert the link graph once, so each iteration is a single pass
+    # over the incoming links of every page
+    incoming = {page: [] for page in corpus}
+    for page, links in corpus.items():
+        for link in links:
+            incoming[link].append(page)
+    linking_pages = [page for page in corpus if corpus[page]]
+    no_link_pages = [page for page in corpus if not corpus[page]]
+
+    page_rank = {page: 1 / N for page in corpus}
     while True:
-        new_page_rank = {page: (1 - damping_factor) / N for page in corpus}
-        no_link_rank = 0
-        for page in corpus:
-            if len(corpus[page]) == 0:
-                new_page_rank[page] += page_rank[page]/N
-            else:
-                for link in corpus[page]:
-                    new_page_rank[link] += damping_factor*page_rank[page]/len(corpus[page])
-        
-        for page in corpus:
-            new_page_rank[page] += damping_factor * no_link_rank
+        # A page with no links is treated as linking to every page
+        no_link_rank = sum(page_rank[page] for page in no_link_pages) / N
+        base_rank = (1 - damping_factor) / N + damping_factor * no_link_rank
+        share = {page: page_rank[page] / len(corpus[page]) for page in linking_pages}
+
+        new_page_rank = {
+            page: base_rank + damping_factor * sum(share[link] for link in incoming[page])
+            for page in corpus
+        }
 
         diff = max(abs(new_page_rank[page] - page_rank[page]) for page in corpus)
+        page_rank = new_page_rank
         if diff < convergence_threshold:
             break
-        page_rank = new_page_rank
-        
+
     return page_rank
 
+
 if __name__ == "__main__":
     main()
@@ -1,8 +1,7 @@
 import sys
 
 from crossword import *
-from collections import defaultdict
-import copy
+from collections import Counter, defaultdict, deque
 
 
 class CrosswordCreator():
@@ -16,6 +15,10 @@ class CrosswordCreator():
             var: self.crossword.words.copy()
             for var in self.crossword.variables
         }
+        self._neighbors = {
+            var: frozenset(self.crossword.neighbors(var))
+            for var in self.crossword.variables
+        }
 
     def letter_grid(self, assignment):
         """
@@ -115,6 +118,13 @@ class CrosswordCreator():
                 word for word in self.domains[var] if var.length != len(word)}
             self.domains[var].difference_update(words_to_remove)
 
+    def _letter_counts(self, var, index):
+        """
+        Return a Counter of how many words in `self.domains[var]` have each
+        letter at position `index`.
+        """
+        return Counter(word[index] for word in self.domains[var])
+
     def revise(self, x, y):
         """
         Make variable `x` arc consistent with variable `y`.
@@ -130,17 +140,14 @@ class CrosswordCreator():
         if overlap is None:
             return revised
 
-        x_domain = self.domains[x].copy()
-        words_to_remove = set()
-
-        for x_word in x_domain:
-            is_consistent = any(
-                x_word[overlap[0]] == y_word[overlap[1]]
-                for y_word in self.domains[y]
-            )
-            if not is_consistent:
-                words_to_remove.add(x_word)
-                revised = True
+        # Letters that `y` can still place at the overlap
+        y_letters = self._letter_counts(y, overlap[1])
+        words_to_remove = {
+            x_word for x_word in self.domains[x]
+            if x_word[overlap[0]] not in y_letters
+        }
+        if words_to_remove:
+            revised = True
 
         self.domains[x].difference_update(words_to_remove)
         return revised
@@ -155,17 +162,17 @@ class CrosswordCreator():
         return False if one or more domains end up empty.
         """
         if arcs is None:
-            queue = [
-                (x, y) for x in self.crossword.variables for y in self.crossword.neighbors(x)]
+            queue = deque(
+                (x, y) for x in self.crossword.variables for y in self._neighbors[x])
         else:
-            queue = list(arcs)
+            queue = deque(arcs)
 
         while queue:
-            (x, y) = queue.pop(0)
+            (x, y) = queue.popleft()
             if self.revise(x, y):
                 if not self.domains[x]:
                     return False
-                for z in set(self.crossword.neighbors(x)-{y}):
+                for z in self._neighbors[x] - {y}:
                     queue.append((z, x))
         return True
 
@@ -188,7 +195,7 @@ class CrosswordCreator():
             values.add(word)
 
         for key1 in assignment:
-            for key2 in self.crossword.neighbors(key1):
+            for key2 in self._neighbors[key1]:
                 if key2 not in assignment:
                     continue
                 overlap = self.crossword.overlaps.get((key1, key2))
@@ -197,6 +204,22 @@ class CrosswordCreator():
                         return False
         return True
 
+    def _consistent_with(self, var, word, assignment):
+        """
+        Return True if assigning `word` to `var` keeps an already consistent
+        `assignment` consistent; return False otherwise.
+        """
+        if var.length != len(word) or word in assignment.values():
+            return False
+
+        for neigh in self._neighbors[var]:
+            if neigh not in assignment:
+                continue
+            overlap = self.crossword.overlaps[(var, neigh)]
+            if word[overlap[0]] != assignment[neigh][overlap[1]]:
+                return False
+        return True
+
     def order_domain_values(self, var, assignment):
         """
         Return a list of values in the domain of `var`, in order by
@@ -204,20 +227,19 @@ class CrosswordCreator():
         The first value in the list, for example, should be the one
         that rules out the fewest values among the neighbors of `var`.
         """
-        neighbors = self.crossword.neighbors(var)
         constraint = defaultdict(int)
 
-        for value in self.domains[var]:
-            for neigh in neighbors:
-                count = 0
-                if neigh in assignment:
-                    continue
-                neigh_values = self.domains[neigh]
-                overlap = self.crossword.overlaps[(var, neigh)]
+        for neigh in self._neighbors[var]:
+            if neigh in assignment:
+                continue
+            overlap = self.crossword.overlaps[(var, neigh)]
+            neigh_size = len(self.domains[neigh])
+            neigh_letters = self._letter_counts(neigh, overlap[1])
 
-                for neigh_value in neigh_values:
-                    if value in neigh_values or value[overlap[0]] != neigh_value[overlap[1]]:
-                        constraint[value] += 1
+            # Every neighbor value without the same letter at the overlap
+            # is ruled out
+            for value in self.domains[var]:
+                constraint[value] += neigh_size - neigh_letters[value[overlap[0]]]
 
         sorted_values = sorted(self.domains[var], key=lambda value: constraint[value])
         return sorted_values
@@ -232,7 +254,7 @@ class CrosswordCreator():
         """
         unassigned_vars = [
             var for var in self.domains if var not in assignment]
-        return min(unassigned_vars, key=lambda var: (len(self.domains[var]), -len(self.crossword.neighbors(var))))
+        return min(unassigned_vars, key=lambda var: (len(self.domains[var]), -len(self._neighbors[var])))
 
     def backtrack(self, assignment):
         """
@@ -247,21 +269,22 @@ class CrosswordCreator():
             return assignment
 
         unassign_var = self.select_unassigned_variable(assignment)
-        original_domains = copy.deepcopy(self.domains)
-        new_assignment = assignment.copy()
+        original_domains = {var: words.copy() for var, words in self.domains.items()}
         for value in self.order_domain_values(unassign_var, assignment):
+            # `assignment` is already consistent, so only the new word needs checking
+            if not self._consistent_with(unassign_var, value, assignment):
+                continue
+
             new_assignment = assignment.copy()
             new_assignment[unassign_var] = value
-
-            if self.consistent(new_assignment):
-                arcs = [(x, y) for x in self.crossword.variables if x not in new_assignment for y in self.crossword.neighbors(x)]
-                inference = self.ac3(arcs)
-
-                if inference:
-                    res = self.backtrack(new_assignment)
-                    if res:
-                        return res
-            self.domains = original_domains
+            arcs = [(x, y) for x in self.crossword.variables if x not in new_assignment for y in self._neighbors[x]]
+            inference = self.ac3(arcs)
+
+            if inference:
+                res = self.backtrack(new_assignment)
+                if res:
+                    return res
+            self.domains = {var: words.copy() for var, words in original_domains.items()}
 
         return None
 
@@ -4,6 +4,7 @@ import os
 import sys
 import tensorflow as tf
 
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.model_selection import train_test_split
 
 EPOCHS = 30
@@ -11,6 +12,7 @@ IMG_WIDTH = 30
 IMG_HEIGHT = 30
 NUM_CATEGORIES = 43
 TEST_SIZE = 0.4
+BATCH_SIZE = 32
 
 
 def main():
@@ -19,26 +21,32 @@ def main():
     if len(sys.argv) not in [2, 3]:
         sys.exit("Usage: python traffic.py data_directory [model.h5]")
 
+    # On a GPU, compute in float16 on tensor cores while keeping float32
+    # master weights; on CPU float16 is only emulated and would be slower
+    if tf.config.list_physical_devices("GPU"):
+        tf.keras.mixed_precision.set_global_policy("mixed_float16")
+
     images, labels = load_data(sys.argv[1])
 
     x_train, x_test, y_train, y_test = train_test_split(
-        np.array(images), np.array(labels), test_size=TEST_SIZE, random_state=42
+        images, labels, test_size=TEST_SIZE, random_state=42
     )
 
-    x_train, x_test = x_train / 255.0, x_test / 255.0
-
     # Convert labels to categorical AFTER splitting
     y_train = tf.keras.utils.to_categorical(y_train, num_classes=NUM_CATEGORIES)
     y_test = tf.keras.utils.to_categorical(y_test, num_classes=NUM_CATEGORIES)
 
+    train_data = make_dataset(x_train, y_train, shuffle=True)
+    test_data = make_dataset(x_test, y_test)
+
     # Get a compiled neural network
     model = get_model()
 
     # Fit model on training data
-    model.fit(x_train, y_train, epochs=EPOCHS, validation_data=(x_test, y_test))
+    model.fit(train_data, epochs=EPOCHS, validation_data=test_data)
 
     # Evaluate neural network performance
-    test_loss, test_accuracy = model.evaluate(x_test, y_test, verbose=2)
+    test_loss, test_accuracy = model.evaluate(test_data, verbose=2)
     print(f"\nTest Accuracy: {test_accuracy:.4f}, Test Loss: {test_loss:.4f}")
 
     model.summary()
@@ -58,30 +66,63 @@ def load_data(data_dir):
     0 through NUM_CATEGORIES - 1. Inside each category directory will be some
     number of image files.
 
-    Return tuple `(images, labels)`. `images` should be a list of all
-    of the images in the data directory, where each image is formatted as a
-    numpy ndarray with dimensions IMG_WIDTH x IMG_HEIGHT x 3. `labels` should
-    be a list of integer labels, representing the categories for each of the
+    Return tuple `(images, labels)`. `images` is a uint8 numpy ndarray of
+    all of the images in the data directory, with dimensions
+    number_of_images x IMG_HEIGHT x IMG_WIDTH x 3. `labels` is a numpy
+    ndarray of integer labels, representing the categories for each of the
     corresponding `images`.
+
+    Images are decoded on a thread pool (OpenCV releases the GIL) straight
+    into a preallocated array.
     """
-    images, labels = [], []
+    paths = []
     for root, dirs, files in os.walk(data_dir):
         category = os.path.basename(root)
         if category.isdigit():
             category = int(category)
             for file in files:
-                file_path = os.path.join(root, file)
-                image = cv2.imread(file_path)
-                if image is not None:
-                    resized_image = cv2.resize(image, (IMG_WIDTH, IMG_HEIGHT))
-                    images.append(resized_image)
-                    labels.append(category)
-                else:
-                    print(f"Warning: Unable to read image {file_path}")
+                paths.append((os.path.join(root, file), category))
+
+    images = np.empty((len(paths), IMG_HEIGHT, IMG_WIDTH, 3), dtype=np.uint8)
+    labels = np.empty(len(paths), dtype=np.int32)
+    loaded = np.zeros(len(paths), dtype=bool)
+
+    def read_image(index):
+        file_path, category = paths[index]
+        image = cv2.imread(file_path)
+        if image is not None:
+            images[index] = cv2.resize(image, (IMG_WIDTH, IMG_HEIGHT))
+            labels[index] = category
+            loaded[index] = True
+        else:
+            print(f"Warning: Unable to read image {file_path}")
+
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(read_image, range(len(paths))))
+
+    # Only drop unreadable images if there were any, to avoid a copy
+    if not loaded.all():
+        images, labels = images[loaded], labels[loaded]
 
     return images, labels
 
 
+def make_dataset(images, labels, shuffle=False):
+    """
+    Returns a batched `tf.data.Dataset` of `(images, labels)`.
+
+    Images stay uint8 in memory and are scaled to [0, 1] float32 one batch
+    at a time, prefetched so batches are prepared while the model trains.
+    """
+    dataset = tf.data.Dataset.from_tensor_slices((images, labels))
+    if shuffle:
+        dataset = dataset.shuffle(10000)
+    return dataset.batch(BATCH_SIZE).map(
+        lambda x, y: (tf.cast(x, tf.float32) / 255.0, y),
+        num_parallel_calls=tf.data.AUTOTUNE
+    ).prefetch(tf.data.AUTOTUNE)
+
+
 def get_model():
     """
     Returns a compiled convolutional neural network model. Assume that the
@@ -100,13 +141,21 @@ def get_model():
         tf.keras.layers.Flatten(),
         tf.keras.layers.Dense(512, activation="relu"),
         tf.keras.layers.Dropout(0.5),
-        tf.keras.layers.Dense(NUM_CATEGORIES, activation="softmax")
+        # Keep the output in float32 so the loss stays numerically stable
+        tf.keras.layers.Dense(NUM_CATEGORIES, activation="softmax", dtype="float32")
     ])
 
+    # Scale the loss to keep float16 gradients from underflowing
+    optimizer = tf.keras.optimizers.Adam()
+    if tf.keras.mixed_precision.global_policy().compute_dtype == "float16":
+        optimizer = tf.keras.mixed_precision.LossScaleOptimizer(optimizer)
+
     model.compile(
-        optimizer="adam",
+        optimizer=optimizer,
         loss="categorical_crossentropy",
-        metrics=["accuracy"]
+        metrics=["accuracy"],
+        # Fuse the small conv/pool kernels with XLA to cut per-step overhead
+        jit_compile=True
     )
 
     return model